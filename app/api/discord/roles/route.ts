@@ -1,6 +1,19 @@
 import { NextRequest, NextResponse } from "next/server";
+import { tokenKey } from "@/lib/discord";
 
 const DISCORD_API = "https://discord.com/api/v10";
+const ROLES_CACHE_TTL_MS = 60 * 1000;
+
+interface FilteredRole {
+  id: string;
+  name: string;
+  color: string | null;
+  position: number;
+  managed: boolean;
+}
+
+// Filtered role lists keyed by token hash + guild; roles rarely change, so reuse them for a short TTL
+const rolesCache = new Map<string, { fetchedAt: number; roles: FilteredRole[] }>();
 
 export async function POST(req: NextRequest) {
   try {
@@ -13,6 +26,18 @@ export async function POST(req: NextRequest) {
       );
     }
 
+    const cacheKey = `${tokenKey(botToken)}:${guildId}`;
+    const cached = rolesCache.get(cacheKey);
+    if (cached && Date.now() - cached.fetchedAt < ROLES_CACHE_TTL_MS) {
+      return NextResponse.json(cached.roles);
+    }
+
+    // Miss: evict every expired entry so the cache only holds live guilds
+    const now = Date.now();
+    for (const [key, entry] of rolesCache) {
+      if (now - entry.fetchedAt >= ROLES_CACHE_TTL_MS) rolesCache.delete(key);
+    }
+
     const res = await fetch(`${DISCORD_API}/guilds/${guildId}/roles`, {
       headers: {
         Authorization: `Bot ${botToken}`,
@@ -30,7 +55,7 @@ export async function POST(req: NextRequest) {
     const roles = await res.json();
 
     // Filter out @everyone role and sort by position descending
-    const filtered = roles
+    const filtered: FilteredRole[] = roles
       .filter((r: { name: string }) => r.name !== "@everyone")
       .sort((a: { position: number }, b: { position: number }) => b.position - a.position)
       .map((r: { id: string; name: string; color: number; position: number; managed: boolean }) => ({
@@ -41,6 +66,7 @@ export async function POST(req: NextRequest) {
         managed: r.managed,
       }));
 
+    rolesCache.set(cacheKey, { fetchedAt: Date.now(), roles: filtered });
     return NextResponse.json(filtered);
   } catch (err) {
     console.error("Roles error:", err);
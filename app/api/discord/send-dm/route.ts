@@ -1,4 +1,5 @@
 import { NextRequest } from "next/server";
+import { tokenKey } from "@/lib/discord";
 
 const DISCORD_API = "https://discord.com/api/v10";
 
@@ -13,7 +14,34 @@ interface DiscordMember {
   roles: string[];
 }
 
+// Discord limits apply per bucket *and* major parameter (the channel, guild or webhook ID)
+const MAJOR_PARAM = /^\/(?:channels|guilds|webhooks)\/(\d+)/;
+const MAX_ROUTE_BUCKETS = 1000;
+
+// Route (method + major parameter + path template) -> Discord bucket, from X-RateLimit-Bucket;
+// oldest routes are evicted past MAX_ROUTE_BUCKETS
+const routeBuckets = new Map<string, string>();
+// Reset times (ms epoch) of exhausted buckets, keyed by token key + bucket + major parameter
+const bucketResets = new Map<string, number>();
+
 async function discordFetch(url: string, botToken: string, options: RequestInit = {}) {
+  const token = tokenKey(botToken);
+  const path = url.split("?")[0].slice(DISCORD_API.length);
+  const major = MAJOR_PARAM.exec(path)?.[1] ?? "";
+  const route = `${options.method || "GET"}:${major}:${path.replace(/\/\d{15,21}/g, "/:id")}`;
+  const bucket = routeBuckets.get(route);
+  if (bucket) {
+    const resetKey = `${token}:${bucket}:${major}`;
+    const resetAt = bucketResets.get(resetKey);
+    if (resetAt !== undefined) {
+      const waitMs = resetAt - Date.now();
+      if (waitMs > 0) {
+        await new Promise((r) => setTimeout(r, waitMs));
+      }
+      bucketResets.delete(resetKey);
+    }
+  }
+
   const res = await fetch(url, {
     ...options,
     headers: {
@@ -23,6 +51,28 @@ async function discordFetch(url: string, botToken: string, options: RequestInit
     },
   });
 
+  const bucketHeader = res.headers.get("X-RateLimit-Bucket");
+  if (bucketHeader) {
+    routeBuckets.delete(route);
+    routeBuckets.set(route, bucketHeader);
+    if (routeBuckets.size > MAX_ROUTE_BUCKETS) {
+      routeBuckets.delete(routeBuckets.keys().next().value as string);
+    }
+    const resetKey = `${token}:${bucketHeader}:${major}`;
+    const remaining = res.headers.get("X-RateLimit-Remaining");
+    const resetAfter = res.headers.get("X-RateLimit-Reset-After");
+    if (remaining === "0" && resetAfter !== null) {
+      const now = Date.now();
+      // Evict resets that have already passed before recording a new one
+      for (const [key, resetAt] of bucketResets) {
+        if (resetAt <= now) bucketResets.delete(key);
+      }
+      bucketResets.set(resetKey, now + Number(resetAfter) * 1000);
+    } else {
+      bucketResets.delete(resetKey);
+    }
+  }
+
   if (res.status === 429) {
     const data = await res.json();
     return { rateLimited: true, retryAfter: data.retry_after || 5 };
@@ -31,12 +81,48 @@ async function discordFetch(url: string, botToken: string, options: RequestInit
   return { rateLimited: false, response: res };
 }
 
-async function getAllMembers(guildId: string, botToken: string): Promise<DiscordMember[]> {
+// Retry 429s with capped exponential backoff plus jitter (or Discord's retry_after if larger)
+async function discordFetchWithBackoff(
+  url: string,
+  botToken: string,
+  options: RequestInit = {},
+  onRetry?: (waitTime: number) => void,
+  attempts = 5,
+  base = 1,
+  cap = 30
+) {
+  let result = await discordFetch(url, botToken, options);
+  for (let attempt = 0; result.rateLimited && attempt < attempts - 1; attempt++) {
+    const waitTime =
+      Math.max(Math.min(cap, base * 2 ** attempt), result.retryAfter as number) + Math.random() * 0.5;
+    onRetry?.(waitTime);
+    await new Promise((r) => setTimeout(r, waitTime * 1000));
+    result = await discordFetch(url, botToken, options);
+  }
+  return result;
+}
+
+// DM channel IDs are stable per bot/recipient pair, so cache them across jobs in an LRU
+// (Map iteration order is insertion order, so the first key is the least recently used)
+const DM_CHANNEL_CACHE_SIZE = 10000;
+const dmChannelCache = new Map<string, string>();
+
+const DISCORD_EPOCH = 1420070400000;
+const STATUS_EDIT_INTERVAL_MS = 2000;
+const MEMBER_FETCH_SHARDS = 8;
+
+// Page through members whose IDs fall in [lo, hi); hi === null means no upper bound
+async function getMembersInRange(
+  guildId: string,
+  botToken: string,
+  lo: bigint,
+  hi: bigint | null
+): Promise<DiscordMember[]> {
   const members: DiscordMember[] = [];
-  let after = "0";
-  let hasMore = true;
+  // `after` is exclusive, so start one below the lower bound
+  let after = lo > BigInt(0) ? lo - BigInt(1) : lo;
 
-  while (hasMore) {
+  while (true) {
     const result = await discordFetch(
       `${DISCORD_API}/guilds/${guildId}/members?limit=1000&after=${after}`,
       botToken
@@ -52,17 +138,44 @@ async function getAllMembers(guildId: string, botToken: string): Promise<Discord
     }
 
     const batch: DiscordMember[] = await result.response!.json();
-    if (batch.length === 0) {
-      hasMore = false;
-    } else {
-      members.push(...batch);
-      after = batch[batch.length - 1].user.id;
-      if (batch.length < 1000) {
-        hasMore = false;
+    for (const member of batch) {
+      if (hi !== null && BigInt(member.user.id) >= hi) {
+        return members;
       }
+      members.push(member);
     }
+    if (batch.length < 1000) {
+      return members;
+    }
+    after = BigInt(batch[batch.length - 1].user.id);
   }
+}
 
+async function getAllMembers(guildId: string, botToken: string): Promise<DiscordMember[]> {
+  // Split the snowflake space (Discord epoch .. now) into ranges and page through them concurrently
+  const maxId = BigInt(Date.now() - DISCORD_EPOCH) << BigInt(22);
+  const step = maxId / BigInt(MEMBER_FETCH_SHARDS);
+  const shards = await Promise.all(
+    Array.from({ length: MEMBER_FETCH_SHARDS }, (_, i) =>
+      getMembersInRange(
+        guildId,
+        botToken,
+        step * BigInt(i),
+        i === MEMBER_FETCH_SHARDS - 1 ? null : step * BigInt(i + 1)
+      )
+    )
+  );
+
+  const seen = new Set<string>();
+  const members: DiscordMember[] = [];
+  for (const shard of shards) {
+    for (const member of shard) {
+      if (!seen.has(member.user.id)) {
+        seen.add(member.user.id);
+        members.push(member);
+      }
+    }
+  }
   return members;
 }
 
@@ -97,9 +210,13 @@ export async function POST(req: NextRequest) {
 
   const encoder = new TextEncoder();
 
+  // Per-job stop signal: set when the client aborts (Stop button) and the stream is cancelled
+  let stopped = false;
+
   const stream = new ReadableStream({
     async start(controller) {
       function send(eventType: string, data: Record<string, unknown>) {
+        if (stopped) return;
         controller.enqueue(
           encoder.encode(`event: ${eventType}\ndata: ${JSON.stringify(data)}\n\n`)
         );
@@ -123,9 +240,8 @@ export async function POST(req: NextRequest) {
 
         // Step 3: Filter by roles if needed
         if (mode === "roles" && roleIds && roleIds.length > 0) {
-          members = members.filter((m) =>
-            m.roles.some((r: string) => roleIds.includes(r))
-          );
+          const roleIdSet = new Set<string>(roleIds);
+          members = members.filter((m) => m.roles.some((r) => roleIdSet.has(r)));
         }
 
         const total = members.length;
@@ -154,74 +270,98 @@ export async function POST(req: NextRequest) {
         let sent = 0;
         let failed = 0;
         let dmClosed = 0;
+        let statusEdit: Promise<void> | null = null;
+        let lastStatusEditAt = 0;
         const delayMs = (delay || 1) * 1000;
 
+        // DM channel cache key prefix for this bot
+        const botKey = tokenKey(botToken);
+
+        // Split the template once; each DM is then a join instead of a regex replace
+        const messageParts: string[] = message.split("<user>");
+        // Without a placeholder every DM has the same body, so serialize it once
+        const staticBody = messageParts.length === 1 ? JSON.stringify({ content: message }) : null;
+
+        // Per-member results are batched into one "logs" event per second, and progress is
+        // sent at most every 500ms, instead of two SSE frames per member
+        let pendingLogs: Record<string, unknown>[] = [];
+        let lastLogFlushAt = Date.now();
+        let lastProgressAt = 0;
+        const flushLogs = () => {
+          if (pendingLogs.length > 0) {
+            send("logs", { entries: pendingLogs });
+            pendingLogs = [];
+          }
+          lastLogFlushAt = Date.now();
+        };
+
+        const reportRateLimit = (waitTime: number) => {
+          flushLogs();
+          send("log", {
+            status: "ratelimit",
+            message: `Rate limited! Waiting ${waitTime.toFixed(1)}s...`,
+          });
+        };
+
         // Step 5: Send DMs
         for (let i = 0; i < members.length; i++) {
+          if (stopped) break;
+
           const member = members[i];
+          const startedAt = Date.now();
           const displayName = member.user.global_name || member.user.username;
 
           try {
-            // Create DM channel
-            let dmResult = await discordFetch(`${DISCORD_API}/users/@me/channels`, botToken, {
-              method: "POST",
-              body: JSON.stringify({ recipient_id: member.user.id }),
-            });
+            // Create DM channel (cached per recipient)
+            const cacheKey = `${botKey}:${member.user.id}`;
+            let dmChannelId = dmChannelCache.get(cacheKey);
+            if (dmChannelId) {
+              dmChannelCache.delete(cacheKey);
+              dmChannelCache.set(cacheKey, dmChannelId);
+              if (dmChannelCache.size > DM_CHANNEL_CACHE_SIZE) {
+                dmChannelCache.delete(dmChannelCache.keys().next().value as string);
+              }
+            } else {
+              const dmResult = await discordFetchWithBackoff(
+                `${DISCORD_API}/users/@me/channels`,
+                botToken,
+                {
+                  method: "POST",
+                  body: JSON.stringify({ recipient_id: member.user.id }),
+                },
+                reportRateLimit
+              );
 
-            // Handle rate limit for DM channel creation
-            if (dmResult.rateLimited) {
-              const waitTime = dmResult.retryAfter as number;
-              send("log", {
-                status: "ratelimit",
-                message: `Rate limited! Waiting ${waitTime}s...`,
-              });
-              await new Promise((r) => setTimeout(r, waitTime * 1000));
-              dmResult = await discordFetch(`${DISCORD_API}/users/@me/channels`, botToken, {
-                method: "POST",
-                body: JSON.stringify({ recipient_id: member.user.id }),
-              });
-            }
+              if (!dmResult.response?.ok) {
+                throw new Error("Cannot create DM channel");
+              }
 
-            if (!dmResult.response?.ok) {
-              throw new Error("Cannot create DM channel");
+              const dmChannel = await dmResult.response.json();
+              dmChannelId = dmChannel.id as string;
+              dmChannelCache.set(cacheKey, dmChannelId);
+              if (dmChannelCache.size > DM_CHANNEL_CACHE_SIZE) {
+                dmChannelCache.delete(dmChannelCache.keys().next().value as string);
+              }
             }
 
-            const dmChannel = await dmResult.response.json();
-
             // Replace <user> placeholder with mention
-            const finalMessage = message.replace(/<user>/g, `<@${member.user.id}>`);
+            const body =
+              staticBody ?? JSON.stringify({ content: messageParts.join(`<@${member.user.id}>`) });
 
             // Send message
-            let msgResult = await discordFetch(
-              `${DISCORD_API}/channels/${dmChannel.id}/messages`,
+            const msgResult = await discordFetchWithBackoff(
+              `${DISCORD_API}/channels/${dmChannelId}/messages`,
               botToken,
               {
                 method: "POST",
-                body: JSON.stringify({ content: finalMessage }),
-              }
+                body,
+              },
+              reportRateLimit
             );
 
-            // Handle rate limit for message sending
-            if (msgResult.rateLimited) {
-              const waitTime = msgResult.retryAfter as number;
-              send("log", {
-                status: "ratelimit",
-                message: `Rate limited! Waiting ${waitTime}s...`,
-              });
-              await new Promise((r) => setTimeout(r, waitTime * 1000));
-              msgResult = await discordFetch(
-                `${DISCORD_API}/channels/${dmChannel.id}/messages`,
-                botToken,
-                {
-                  method: "POST",
-                  body: JSON.stringify({ content: finalMessage }),
-                }
-              );
-            }
-
             if (msgResult.response?.ok) {
               sent++;
-              send("log", {
+              pendingLogs.push({
                 status: "success",
                 message: `Sent to ${displayName}`,
                 username: displayName,
@@ -230,14 +370,14 @@ export async function POST(req: NextRequest) {
               const errStatus = msgResult.response?.status;
               if (errStatus === 403) {
                 dmClosed++;
-                send("log", {
+                pendingLogs.push({
                   status: "dm_closed",
                   message: `${displayName} - DMs disabled`,
                   username: displayName,
                 });
               } else {
                 failed++;
-                send("log", {
+                pendingLogs.push({
                   status: "failed",
                   message: `Failed: ${displayName} (${errStatus})`,
                   username: displayName,
@@ -246,34 +386,59 @@ export async function POST(req: NextRequest) {
             }
           } catch {
             failed++;
-            send("log", {
+            pendingLogs.push({
               status: "failed",
               message: `Failed: ${displayName} - Error`,
               username: displayName,
             });
           }
 
-          send("progress", { sent, failed, total, dmClosed });
+          const now = Date.now();
+          if (now - lastLogFlushAt >= 1000) {
+            flushLogs();
+          }
+          if (now - lastProgressAt >= 500 || i === members.length - 1) {
+            send("progress", { sent, failed, total, dmClosed });
+            lastProgressAt = now;
+          }
 
-          // Update status message in Discord channel every 5 members
-          if (statusChannelId && statusMessageId && (i + 1) % 5 === 0) {
+          // Update status message in Discord channel in the background: at most one edit in
+          // flight and one every STATUS_EDIT_INTERVAL_MS, so the DM loop never waits on it
+          if (
+            statusChannelId &&
+            statusMessageId &&
+            !statusEdit &&
+            now - lastStatusEditAt >= STATUS_EDIT_INTERVAL_MS
+          ) {
             const progress = sent + failed + dmClosed;
-            await editStatusMessage(statusChannelId, statusMessageId, botToken,
+            lastStatusEditAt = now;
+            statusEdit = editStatusMessage(statusChannelId, statusMessageId, botToken,
               `**Mass DM In Progress...**\nProgress: ${progress}/${total} members\nSuccess: ${sent} | Failed: ${failed} | DM Closed: ${dmClosed}`
-            );
+            )
+              .catch(() => {})
+              .finally(() => {
+                statusEdit = null;
+              });
           }
 
-          // Delay between messages
-          if (i < members.length - 1) {
-            await new Promise((r) => setTimeout(r, delayMs));
+          // Delay between messages: a floor measured from the start of this send,
+          // since discordFetch already waits out exhausted rate-limit buckets
+          const waitMs = delayMs - (Date.now() - startedAt);
+          // Waited in short slices so a cancelled stream ends the delay promptly
+          const waitUntil = Date.now() + waitMs;
+          while (i < members.length - 1 && !stopped && Date.now() < waitUntil) {
+            await new Promise((r) => setTimeout(r, Math.min(200, waitUntil - Date.now())));
           }
         }
 
+        flushLogs();
+
         // Final status message update
+        await statusEdit;
         if (statusChannelId && statusMessageId) {
           const progress = sent + failed + dmClosed;
           await editStatusMessage(statusChannelId, statusMessageId, botToken,
-            `**Mass DM Complete!**\nTotal: ${progress}/${total} members\nSuccess: ${sent} | Failed: ${failed} | DM Closed: ${dmClosed}`
+            `**Mass DM ${stopped ? "Stopped" : "Complete!"}**\nTotal: ${progress}/${total} members\nSuccess: ${sent} | Failed: ${failed} | DM Closed: ${dmClosed}`
           );
         }
 
@@ -281,16 +446,21 @@ export async function POST(req: NextRequest) {
       } catch (err) {
         send("error", { message: `Unexpected error: ${(err as Error).message}` });
       } finally {
-        controller.close();
+        if (!stopped) controller.close();
       }
     },
+    cancel() {
+      stopped = true;
+    },
   });
 
   return new Response(stream, {
     headers: {
       "Content-Type": "text/event-stream",
-      "Cache-Control": "no-cache",
+      "Cache-Control": "no-cache, no-transform",
       Connection: "keep-alive",
+      // Stop reverse proxies (nginx, Railway's edge) from buffering frames
+      "X-Accel-Buffering": "no",
     },
   });
 }
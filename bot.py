@@ -1,15 +1,27 @@
 import os
+import json
+import time
+import hashlib
+import random
 import asyncio
 import discord
+from collections import OrderedDict, defaultdict
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime
+from functools import lru_cache
 
 # ─── Config from Environment Variables ─────────────────────────────
 DISCORD_BOT_TOKEN = os.environ.get("DISCORD_BOT_TOKEN", "")
 GUILD_ID = os.environ.get("GUILD_ID", "")
 LOG_CHANNEL_ID = os.environ.get("LOG_CHANNEL_ID", "")
 ALLOWED_CHANNEL = os.environ.get("ALLOWED_CHANNEL", "")  # optional: restrict command to this channel
+LOG_WEBHOOK_URL = os.environ.get("LOG_WEBHOOK_URL", "")  # optional: post log/progress via webhook
+DM_CONCURRENCY = max(1, int(os.environ.get("DM_CONCURRENCY", "8")))  # max DMs in flight; sends still start delay_sec apart
+PROGRESS_INTERVAL = 2.0  # minimum seconds between progress embed edits
+DM_CHANNEL_CACHE_SIZE = 10000  # DM channel IDs kept in the LRU cache
+MAX_RATELIMIT_WAIT = 30.0  # longer rate limits raise discord.RateLimited (discord.py's minimum is 30)
+CMD_HASH_FILE = "/tmp/.cmd_hash"  # hash of the last synced command tree
 
 # ─── Bot Setup ─────────────────────────────────────────────────────
 intents = discord.Intents.default()
@@ -17,70 +29,206 @@ intents.members = True
 intents.message_content = True
 intents.guilds = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = commands.Bot(
+    command_prefix="!",
+    intents=intents,
+    chunk_guilds_at_startup=True,
+    max_ratelimit_timeout=MAX_RATELIMIT_WAIT,
+)
 
-# Global state for stopping
-stop_flags = {}
+# Commands are registered guild-local so startup needs a single bulk-overwrite.
+# A malformed GUILD_ID is left for the startup checks below to report.
+GUILD_OBJ = discord.Object(id=int(GUILD_ID)) if GUILD_ID.isdigit() else None
+
+# Role ID -> member IDs, and non-bot member IDs, for the configured guild (kept in sync by events)
+bot.role_index = defaultdict(set)
+bot.human_ids = set()
+
+# LRU of DM channel IDs keyed by user ID (discord.py only keeps a small LRU of private channels)
+bot.dm_channels = OrderedDict()
+
+# Global state for stopping: one event per running session, keyed by user ID
+stop_events = {}
+
+# Log webhook, created on first use
+log_webhook = None
 
 
 # ─── Helpers ───────────────────────────────────────────────────────
 
-def make_progress_embed(title, sent, failed, dm_closed, total, status="in_progress", extra=""):
-    """Create a styled embed for progress updates."""
-    progress = sent + failed + dm_closed
-    pct = int((progress / total) * 100) if total > 0 else 0
+# [monotonic time of last refresh, cached datetime]
+utcnow_cache = [0.0, None]
 
-    bar_filled = int(pct / 5)
-    bar_empty = 20 - bar_filled
-    bar = "\u2588" * bar_filled + "\u2591" * bar_empty
-
-    if status == "in_progress":
-        color = discord.Color.blue()
-        icon = "\U0001f4e8"
-    elif status == "complete":
-        color = discord.Color.green()
-        icon = "\u2705"
-    elif status == "stopped":
-        color = discord.Color.orange()
-        icon = "\u26a0\ufe0f"
-    else:
-        color = discord.Color.red()
-        icon = "\u274c"
 
-    embed = discord.Embed(
-        title=f"{icon} {title}",
-        color=color,
-        timestamp=datetime.utcnow(),
-    )
-    embed.add_field(name="Progress", value=f"`{bar}` {pct}% ({progress}/{total})", inline=False)
-    embed.add_field(name="Sent", value=f"```\n{sent}\n```", inline=True)
-    embed.add_field(name="Failed", value=f"```\n{failed}\n```", inline=True)
-    embed.add_field(name="DM Closed", value=f"```\n{dm_closed}\n```", inline=True)
+def cached_utcnow():
+    """Return datetime.utcnow(), refreshed at most once per second."""
+    t = time.monotonic()
+    if utcnow_cache[1] is None or t - utcnow_cache[0] > 1.0:
+        utcnow_cache[:] = [t, datetime.utcnow()]
+    return utcnow_cache[1]
+
+
+# (icon, color) per progress status; anything unknown renders as an error
+PROGRESS_STYLES = {
+    "in_progress": ("\U0001f4e8", discord.Color.blue()),
+    "complete": ("\u2705", discord.Color.green()),
+    "stopped": ("\u26a0\ufe0f", discord.Color.orange()),
+    "error": ("\u274c", discord.Color.red()),
+}
+
+
+@lru_cache(maxsize=21)
+def progress_bar(filled):
+    """Return the 20-cell progress bar with `filled` cells filled."""
+    return "\u2588" * filled + "\u2591" * (20 - filled)
+
+
+def make_progress_embed(title, sent, failed, dm_closed, total, status="in_progress", extra="", embed=None):
+    """Create a styled embed for progress updates, or update `embed` (a previous result) in place."""
+    progress = sent + failed + dm_closed
+    pct = int((progress / total) * 100) if total > 0 else 0
+    bar = progress_bar(pct // 5)
+    icon, color = PROGRESS_STYLES.get(status, PROGRESS_STYLES["error"])
+
+    if embed is None:
+        embed = discord.Embed()
+        embed.add_field(name="Progress", value="", inline=False)
+        embed.add_field(name="Sent", value="", inline=True)
+        embed.add_field(name="Failed", value="", inline=True)
+        embed.add_field(name="DM Closed", value="", inline=True)
+        embed.set_footer(text="Discord Mass DM Bot")
+
+    embed.title = f"{icon} {title}"
+    embed.color = color
+    embed.timestamp = cached_utcnow()
+    embed.set_field_at(0, name="Progress", value=f"`{bar}` {pct}% ({progress}/{total})", inline=False)
+    embed.set_field_at(1, name="Sent", value=f"```\n{sent}\n```", inline=True)
+    embed.set_field_at(2, name="Failed", value=f"```\n{failed}\n```", inline=True)
+    embed.set_field_at(3, name="DM Closed", value=f"```\n{dm_closed}\n```", inline=True)
 
     if extra:
-        embed.add_field(name="Info", value=extra, inline=False)
+        if len(embed.fields) > 4:
+            embed.set_field_at(4, name="Info", value=extra, inline=False)
+        else:
+            embed.add_field(name="Info", value=extra, inline=False)
 
-    embed.set_footer(text="Discord Mass DM Bot")
     return embed
 
 
+def index_member(member):
+    """Add a member to the role index."""
+    for role in member.roles:
+        bot.role_index[role.id].add(member.id)
+    if not member.bot:
+        bot.human_ids.add(member.id)
+
+
+def unindex_member(member):
+    """Remove a member from the role index."""
+    for role in member.roles:
+        bot.role_index[role.id].discard(member.id)
+    bot.human_ids.discard(member.id)
+
+
+def rebuild_role_index(guild):
+    """Rebuild the role index from the guild's member cache."""
+    bot.role_index.clear()
+    bot.human_ids.clear()
+    for member in guild.members:
+        index_member(member)
+
+
+def is_target_guild(guild):
+    """Whether the guild is the one configured by GUILD_ID."""
+    return bool(GUILD_ID) and guild.id == int(GUILD_ID)
+
+
+def get_log_webhook():
+    """Return the log webhook, or None if LOG_WEBHOOK_URL is not set."""
+    global log_webhook
+    if LOG_WEBHOOK_URL and log_webhook is None:
+        log_webhook = discord.Webhook.from_url(LOG_WEBHOOK_URL, client=bot)
+    return log_webhook
+
+
+def command_tree_hash():
+    """Hash the command payloads (plus app/guild IDs) that sync would upload."""
+    payload = {
+        "app": bot.application_id,
+        "guild": GUILD_ID,
+        "commands": [cmd.to_dict(bot.tree) for cmd in bot.tree.get_commands(guild=GUILD_OBJ)],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+async def with_backoff(coro_fn, attempts=3, base=1.0, cap=30.0, on_retry=None):
+    """Await coro_fn(), backing off with jitter when a long rate limit surfaces.
+
+    Last resort only: discord.py already sleeps on and retries 429s up to MAX_RATELIMIT_WAIT
+    itself. Longer limits raise discord.RateLimited, which is retried here after
+    max(retry_after, capped exponential backoff) plus jitter.
+    """
+    for attempt in range(attempts):
+        try:
+            return await coro_fn()
+        except discord.RateLimited as e:
+            if attempt == attempts - 1:
+                raise
+            wait = max(e.retry_after, min(cap, base * 2 ** attempt))
+            wait += random.uniform(0, 0.5)
+            if on_retry:
+                await on_retry(wait)
+            await asyncio.sleep(wait)
+
+
+async def get_dm_channel(member):
+    """Return the member's DM channel, only hitting the API on a cache miss."""
+    channel_id = bot.dm_channels.get(member.id)
+    if channel_id is not None:
+        bot.dm_channels.move_to_end(member.id)
+        return bot.get_partial_messageable(channel_id, type=discord.ChannelType.private)
+
+    dm_channel = await member.create_dm()
+    bot.dm_channels[member.id] = dm_channel.id
+    if len(bot.dm_channels) > DM_CHANNEL_CACHE_SIZE:
+        bot.dm_channels.popitem(last=False)
+    return dm_channel
+
+
 async def send_mass_dm(interaction, message_text, mode, role_ids, delay_sec):
+    """Register a stop event for the user and run the mass DM, always cleaning up the event."""
+    user_id = interaction.user.id
+    stop = asyncio.Event()
+    stop_events[user_id] = stop
+    try:
+        await run_mass_dm(interaction, message_text, mode, role_ids, delay_sec, stop)
+    finally:
+        # Only drop our own event; a newer session by the same user may have replaced it
+        if stop_events.get(user_id) is stop:
+            del stop_events[user_id]
+
+
+async def run_mass_dm(interaction, message_text, mode, role_ids, delay_sec, stop):
     """Core logic: send DMs to guild members with live progress."""
     guild = bot.get_guild(int(GUILD_ID))
     if not guild:
         await interaction.followup.send("\u274c Cannot find the guild. Check `GUILD_ID`.", ephemeral=True)
         return
 
-    session_id = str(interaction.user.id)
-    stop_flags[session_id] = False
-
     # Fetch all members
     await interaction.followup.send("\u23f3 Fetching server members...", ephemeral=True)
-    members = [m for m in guild.members if not m.bot]
+    # Members come from the gateway cache; only chunk if startup chunking hasn't finished
+    if not guild.chunked:
+        await guild.chunk()
+        rebuild_role_index(guild)
 
-    # Filter by roles
+    # Filter by roles through the role index instead of scanning every member's roles
     if mode == "roles" and role_ids:
-        members = [m for m in members if any(str(r.id) in role_ids for r in m.roles)]
+        role_ids_int = {int(r) for r in role_ids}
+        target_ids = set().union(*(bot.role_index.get(rid, ()) for rid in role_ids_int))
+        members = [m for m in map(guild.get_member, target_ids) if m and not m.bot]
+    else:
+        members = [m for m in guild.members if not m.bot]
 
     total = len(members)
     if total == 0:
@@ -92,94 +240,186 @@ async def send_mass_dm(interaction, message_text, mode, role_ids, delay_sec):
     if LOG_CHANNEL_ID:
         log_channel = bot.get_channel(int(LOG_CHANNEL_ID))
 
-    embed = make_progress_embed("Mass DM Started", 0, 0, 0, total)
+    # Webhooks have their own rate-limit buckets, so log traffic doesn't eat into the DM quota
+    webhook = get_log_webhook()
+    log_target = webhook or log_channel
+
+    # One embed per session, updated in place for every progress edit
+    progress_embed = make_progress_embed("Mass DM Started", 0, 0, 0, total)
     progress_msg = None
-    if log_channel:
-        progress_msg = await log_channel.send(embed=embed)
+    try:
+        if webhook:
+            progress_msg = await webhook.send(embed=progress_embed, wait=True)
+        elif log_channel:
+            progress_msg = await log_channel.send(embed=progress_embed)
+    except discord.HTTPException:
+        pass
 
     # Also send progress in the command channel
-    cmd_progress_msg = await interaction.followup.send(embed=embed, wait=True)
+    cmd_progress_msg = await interaction.followup.send(embed=progress_embed, wait=True)
+
+    # Split the template once; each DM is then a join instead of a replace() scan
+    message_parts = message_text.split("<user>")
 
     sent = 0
     failed = 0
     dm_closed = 0
+    done = 0
 
-    for i, member in enumerate(members):
-        if stop_flags.get(session_id, False):
-            break
+    lock = asyncio.Lock()
+    sem = asyncio.Semaphore(DM_CONCURRENCY)
 
-        display_name = member.display_name
-        final_message = message_text.replace("<user>", member.mention)
+    # Workers only mark progress dirty and queue log lines; one publisher edits both embeds and
+    # posts the queued lines at most every PROGRESS_INTERVAL, outside the DM semaphore
+    progress_dirty = asyncio.Event()
+    pending_logs = []
 
+    async def update_progress(embed):
+        edits = [cmd_progress_msg.edit(embed=embed)]
+        if progress_msg:
+            edits.append(progress_msg.edit(embed=embed))
+        await asyncio.gather(*edits, return_exceptions=True)
+
+    async def send_log(text):
         try:
-            dm_channel = await member.create_dm()
-            await dm_channel.send(final_message)
-            sent += 1
-            status_text = f"\u2705 Sent to **{display_name}**"
-        except discord.Forbidden:
-            dm_closed += 1
-            status_text = f"\U0001f512 {display_name} - DMs disabled"
-        except discord.HTTPException as e:
-            if e.status == 429:
-                retry_after = e.retry_after if hasattr(e, "retry_after") else 5
-                status_text = f"\u23f1\ufe0f Rate limited! Waiting {retry_after}s..."
-                if log_channel:
-                    await log_channel.send(f"\u23f1\ufe0f Rate limited! Waiting {retry_after}s...")
-                await asyncio.sleep(retry_after)
-                # Retry once
-                try:
-                    await dm_channel.send(final_message)
-                    sent += 1
-                    status_text = f"\u2705 Sent to **{display_name}** (after retry)"
-                except Exception:
-                    failed += 1
-                    status_text = f"\u274c Failed: **{display_name}** (after retry)"
-            else:
-                failed += 1
-                status_text = f"\u274c Failed: **{display_name}** ({e.status})"
-        except Exception:
-            failed += 1
-            status_text = f"\u274c Failed: **{display_name}** - Error"
+            await log_target.send(text)
+        except discord.HTTPException:
+            pass
+
+    async def flush_logs():
+        if not log_target or not pending_logs:
+            pending_logs.clear()
+            return
+        lines = pending_logs[:]
+        pending_logs.clear()
+        # One message per batch, split to stay under Discord's 2000 character limit
+        chunk = ""
+        for line in lines:
+            if chunk and len(chunk) + len(line) + 1 > 2000:
+                await send_log(chunk)
+                chunk = ""
+            chunk = f"{chunk}\n{line}" if chunk else line
+        if chunk:
+            await send_log(chunk)
+
+    # Set once the workers are finished; the publisher then posts the queued lines and exits.
+    # It is never cancelled, so a flush in progress can't drop lines it has already dequeued.
+    publisher_done = asyncio.Event()
+
+    async def progress_publisher():
+        while True:
+            await progress_dirty.wait()
+            progress_dirty.clear()
+            if publisher_done.is_set():
+                # Final pass: the caller makes the final embed edit itself
+                await flush_logs()
+                return
+            await asyncio.gather(
+                update_progress(make_progress_embed(
+                    "Mass DM In Progress...", sent, failed, dm_closed, total, embed=progress_embed
+                )),
+                flush_logs(),
+            )
+            try:
+                await asyncio.wait_for(publisher_done.wait(), timeout=PROGRESS_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def report_rate_limit(wait):
+        pending_logs.append(f"\u23f1\ufe0f Rate limited! Waiting {wait:.1f}s...")
+        progress_dirty.set()
+
+    # Sends start at least delay_sec apart across all workers; concurrency only overlaps request time.
+    # discord.py already waits on X-RateLimit-* headers, so the delay is a floor on top of that.
+    next_send_at = time.monotonic()
+
+    async def wait_for_turn():
+        """Reserve the next send slot and wait for it; returns False if stopped while waiting."""
+        nonlocal next_send_at
+        async with lock:
+            now = time.monotonic()
+            start_at = max(now, next_send_at)
+            next_send_at = start_at + delay_sec
+        # Waits on the stop event so pressing Stop ends the delay immediately
+        if start_at > now:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=start_at - now)
+            except asyncio.TimeoutError:
+                pass
+        return not stop.is_set()
 
-        # Log each DM result to log channel
-        if log_channel and (i + 1) % 3 == 0:
-            await log_channel.send(status_text)
+    async def worker(member):
+        nonlocal sent, failed, dm_closed, done
+        if stop.is_set():
+            return
+
+        async with sem:
+            if stop.is_set() or not await wait_for_turn():
+                return
+
+            display_name = member.display_name
+            final_message = member.mention.join(message_parts)
 
-        # Update progress embed every 5 members or on last member
-        if (i + 1) % 5 == 0 or (i + 1) == total:
-            embed = make_progress_embed("Mass DM In Progress...", sent, failed, dm_closed, total)
             try:
-                if progress_msg:
-                    await progress_msg.edit(embed=embed)
-                await cmd_progress_msg.edit(embed=embed)
+                dm_channel = await with_backoff(lambda: get_dm_channel(member), on_retry=report_rate_limit)
+                await with_backoff(lambda: dm_channel.send(final_message), on_retry=report_rate_limit)
+                outcome = "sent"
+                status_text = f"\u2705 Sent to **{display_name}**"
+            except discord.Forbidden:
+                outcome = "dm_closed"
+                status_text = f"\U0001f512 {display_name} - DMs disabled"
+            except discord.HTTPException as e:
+                outcome = "failed"
+                status_text = f"\u274c Failed: **{display_name}** ({e.status})"
             except Exception:
-                pass
+                outcome = "failed"
+                status_text = f"\u274c Failed: **{display_name}** - Error"
 
-        # Delay
-        if i < len(members) - 1 and not stop_flags.get(session_id, False):
-            await asyncio.sleep(delay_sec)
+            async with lock:
+                if outcome == "sent":
+                    sent += 1
+                elif outcome == "dm_closed":
+                    dm_closed += 1
+                else:
+                    failed += 1
+                done += 1
+                # Log every third DM result to the log channel
+                if done % 3 == 0:
+                    pending_logs.append(status_text)
+            progress_dirty.set()
+
+    publisher = asyncio.create_task(progress_publisher())
+    tasks = [asyncio.create_task(worker(m)) for m in members]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            await fut
+            if stop.is_set():
+                break
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        publisher_done.set()
+        progress_dirty.set()
+        await asyncio.gather(publisher, return_exceptions=True)
 
     # Final update
-    was_stopped = stop_flags.get(session_id, False)
+    was_stopped = stop.is_set()
     status = "stopped" if was_stopped else "complete"
     title = "Mass DM Stopped" if was_stopped else "Mass DM Complete!"
 
-    embed = make_progress_embed(title, sent, failed, dm_closed, total, status=status)
-    try:
-        if progress_msg:
-            await progress_msg.edit(embed=embed)
-        await cmd_progress_msg.edit(embed=embed)
-    except Exception:
-        pass
+    await update_progress(make_progress_embed(
+        title, sent, failed, dm_closed, total, status=status, embed=progress_embed
+    ))
 
-    if log_channel:
+    if log_target:
+        await flush_logs()
         summary = (
             f"**{'Stopped' if was_stopped else 'Complete'}!** "
             f"Sent: {sent} | Failed: {failed} | DM Closed: {dm_closed} | Total: {total}"
         )
-        await log_channel.send(summary)
-
-    stop_flags.pop(session_id, None)
+        await send_log(summary)
 
 
 # ─── Views (Buttons & Modals) ─────────────────────────────────────
@@ -243,7 +483,7 @@ class RoleSelectView(discord.ui.View):
                 discord.SelectOption(
                     label=r.name,
                     value=str(r.id),
-                    description=f"Members: {len(r.members)}",
+                    description=f"Members: {len(bot.role_index.get(r.id, ()))}",
                 )
             )
 
@@ -312,9 +552,9 @@ class MainMenuView(discord.ui.View):
 
     @discord.ui.button(label="Stop Sending", style=discord.ButtonStyle.red, emoji="\u23f9\ufe0f")
     async def stop_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        session_id = str(interaction.user.id)
-        if session_id in stop_flags:
-            stop_flags[session_id] = True
+        stop = stop_events.get(interaction.user.id)
+        if stop is not None:
+            stop.set()
             await interaction.response.send_message("\u23f9\ufe0f Stopping mass DM...", ephemeral=True)
         else:
             await interaction.response.send_message("No active DM session found.", ephemeral=True)
@@ -322,7 +562,7 @@ class MainMenuView(discord.ui.View):
 
 # ─── Slash Command ─────────────────────────────────────────────────
 
-@bot.tree.command(name="massdm", description="Open the Mass DM control panel")
+@bot.tree.command(name="massdm", description="Open the Mass DM control panel", guild=GUILD_OBJ)
 async def massdm_command(interaction: discord.Interaction):
     # Check allowed channel
     if ALLOWED_CHANNEL and str(interaction.channel_id) != ALLOWED_CHANNEL:
@@ -341,13 +581,13 @@ async def massdm_command(interaction: discord.Interaction):
         return
 
     guild = bot.get_guild(int(GUILD_ID))
-    member_count = len([m for m in guild.members if not m.bot]) if guild else 0
+    member_count = len(bot.human_ids) if guild else 0
 
     embed = discord.Embed(
         title="\U0001f4ec Discord Mass DM Panel",
         description="Choose an action below to send direct messages to server members.",
         color=discord.Color.from_str("#5865F2"),
-        timestamp=datetime.utcnow(),
+        timestamp=cached_utcnow(),
     )
     embed.add_field(
         name="\U0001f4ca Server Info",
@@ -387,15 +627,27 @@ async def on_ready():
     print(f"  Allowed Channel: {ALLOWED_CHANNEL or 'Any'}")
     print(f"{'='*50}")
 
-    # Sync slash commands
+    # Build the role index from the member cache (chunked at startup via intents.members)
+    guild = bot.get_guild(int(GUILD_ID)) if GUILD_ID else None
+    if guild:
+        rebuild_role_index(guild)
+
+    # Sync slash commands (skipped when the tree is unchanged since the last sync)
     try:
-        if GUILD_ID:
-            guild_obj = discord.Object(id=int(GUILD_ID))
-            bot.tree.copy_global_to(guild=guild_obj)
-            synced = await bot.tree.sync(guild=guild_obj)
+        tree_hash = command_tree_hash()
+        try:
+            with open(CMD_HASH_FILE) as f:
+                last_hash = f.read().strip()
+        except OSError:
+            last_hash = ""
+
+        if tree_hash == last_hash:
+            print("  Commands unchanged, skipping sync")
         else:
-            synced = await bot.tree.sync()
-        print(f"  Synced {len(synced)} command(s)")
+            synced = await bot.tree.sync(guild=GUILD_OBJ)
+            print(f"  Synced {len(synced)} command(s)")
+            with open(CMD_HASH_FILE, "w") as f:
+                f.write(tree_hash)
     except Exception as e:
         print(f"  Failed to sync commands: {e}")
 
@@ -420,6 +672,25 @@ async def on_ready():
             await channel.send(embed=embed)
 
 
+@bot.event
+async def on_member_join(member):
+    if is_target_guild(member.guild):
+        index_member(member)
+
+
+@bot.event
+async def on_member_remove(member):
+    if is_target_guild(member.guild):
+        unindex_member(member)
+
+
+@bot.event
+async def on_member_update(before, after):
+    if is_target_guild(after.guild) and before.roles != after.roles:
+        unindex_member(before)
+        index_member(after)
+
+
 # ─── Run ───────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
@@ -429,5 +700,8 @@ if __name__ == "__main__":
     if not GUILD_ID:
         print("ERROR: GUILD_ID is not set!")
         exit(1)
+    if not GUILD_ID.isdigit():
+        print("ERROR: GUILD_ID must be a numeric server ID!")
+        exit(1)
 
     bot.run(DISCORD_BOT_TOKEN)
@@ -77,11 +77,23 @@ export default function DiscordBotUI() {
 
   const addLog = useCallback(
     (status: LogEntry["status"], message: string) => {
-      logIdRef.current++;
-      setLogs((prev) => [
-        ...prev,
-        { id: logIdRef.current, status, message, timestamp: new Date() },
-      ]);
+      const id = ++logIdRef.current;
+      setLogs((prev) => [...prev, { id, status, message, timestamp: new Date() }]);
+    },
+    []
+  );
+
+  // Append a batch of entries in one update; ids are assigned here, not in the updater
+  const addLogs = useCallback(
+    (entries: { status: LogEntry["status"]; message: string }[]) => {
+      const timestamp = new Date();
+      const batch = entries.map(({ status, message }) => ({
+        id: ++logIdRef.current,
+        status,
+        message,
+        timestamp,
+      }));
+      setLogs((prev) => [...prev, ...batch]);
     },
     []
   );
@@ -184,6 +196,9 @@ export default function DiscordBotUI() {
                 case "log":
                   addLog(data.status, data.message);
                   break;
+                case "logs":
+                  addLogs(data.entries);
+                  break;
                 case "progress":
                   setProgress(data);
                   break;
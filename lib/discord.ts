@@ -0,0 +1,6 @@
+import { createHash } from "crypto";
+
+// Short, non-reversible key for a bot token, so module-level caches never hold raw tokens
+export function tokenKey(botToken: string) {
+  return createHash("sha256").update(botToken).digest("hex").slice(0, 16);
+}